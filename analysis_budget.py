@@ -0,0 +1,62 @@
+import time
+
+# ------------------ Budgets ------------------
+# Longest stretch of video analysed per test, in seconds
+MAX_TEST_DURATION_S = {
+    "pushups": 60,
+    "situps": 60,
+    "sit_and_reach": 30,
+    "vertical_jump": 30,
+}
+NO_PERSON_TIMEOUT_S = 5   # Stop once nobody has been detected for this long
+START_GRACE_S = 15        # Before anyone is first detected, allow this long to get into frame
+JOB_DEADLINE_S = 120      # Wall-clock limit for a whole job, conversion included
+
+
+class AnalysisBudget:
+    """
+    Decides when an analysis loop should stop early.
+    Analyzers call exhausted() once per frame; when it returns True they stop reading
+    and return what they have so far, and stop_reason says which budget ran out.
+    """
+
+    def __init__(self, max_duration_s=None, no_person_timeout_s=NO_PERSON_TIMEOUT_S,
+                 deadline_s=JOB_DEADLINE_S, start_grace_s=START_GRACE_S):
+        self.max_duration_s = max_duration_s
+        self.no_person_timeout_s = no_person_timeout_s
+        self.start_grace_s = start_grace_s
+        self.deadline = time.monotonic() + deadline_s if deadline_s else None
+        self.last_seen_s = None  # video time of the latest pose; None until the first one
+        self.stop_reason = None
+
+    @classmethod
+    def for_test(cls, test_type):
+        return cls(max_duration_s=MAX_TEST_DURATION_S.get(test_type))
+
+    @property
+    def partial(self):
+        return self.stop_reason is not None
+
+    def remaining(self):
+        """Seconds left before the wall-clock deadline, or None if there is none."""
+        return max(0.0, self.deadline - time.monotonic()) if self.deadline else None
+
+    def exhausted(self, video_time_s, person_seen):
+        """Takes the current position in the video and whether a pose was found in this frame."""
+        if person_seen:
+            self.last_seen_s = video_time_s
+
+        # The no-person clock starts at the first detection; until then the athlete may
+        # still be walking into frame, so the clip start gets its own, longer, grace period
+        if self.last_seen_s is None:
+            no_person_s, timeout_s = video_time_s, self.start_grace_s
+        else:
+            no_person_s, timeout_s = video_time_s - self.last_seen_s, self.no_person_timeout_s
+
+        if self.max_duration_s and video_time_s >= self.max_duration_s:
+            self.stop_reason = "max_duration"
+        elif self.no_person_timeout_s and timeout_s and no_person_s >= timeout_s:
+            self.stop_reason = "no_person"
+        elif self.deadline and time.monotonic() >= self.deadline:
+            self.stop_reason = "deadline"
+        return self.partial
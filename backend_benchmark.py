@@ -0,0 +1,126 @@
+"""
+Pose backend benchmark: speed and scoring agreement on the sample clips.
+
+For each backend configuration it reports pose-only throughput (fps), the mean
+distance of its visible landmarks from the reference configuration (MediaPipe
+full model), and how many analyzer scores match the reference.
+Configurations whose model can't be loaded (no onnxruntime, no ONNX model files,
+or a MediaPipe model that hasn't been fetched with `python pose_backend.py 0 2`) are skipped.
+
+Usage: python backend_benchmark.py [--threads N] [video ...]   (defaults to static/uploads/conv_*.mp4)
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from pose_backend   import create_pose_backend
+from pushup_counter import pushup_counter
+from sit_ups        import situp_counter
+from sit_and_reach  import sit_and_reach_tracker
+from vertical_jump  import detect_jumps_autoheight
+
+REFERENCE = "mediapipe-full"
+
+
+def configs(threads):
+    return {
+        "mediapipe-lite": dict(backend="mediapipe", model_complexity=0),
+        "mediapipe-full": dict(backend="mediapipe", model_complexity=1),
+        "mediapipe-heavy": dict(backend="mediapipe", model_complexity=2),
+        "onnx": dict(backend="onnx", num_threads=threads),
+    }
+
+
+def read_frames(path):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def run_pose(options, frames):
+    """Returns pose-only fps and per-frame (33, 3) arrays of x px, y px, visibility (None if no pose)."""
+    h, w = frames[0].shape[:2]
+    with create_pose_backend(**options) as pose:
+        pose.process(frames[0])  # warm up outside the timing
+        start = time.perf_counter()
+        results = [pose.process(rgb) for rgb in frames]
+        fps = len(frames) / (time.perf_counter() - start)
+    arrays = [np.array([(p.x * w, p.y * h, p.visibility) for p in r.landmark]) if r else None for r in results]
+    return fps, arrays
+
+
+def landmark_error(arrays, reference):
+    """Mean px distance between landmarks visible in both runs."""
+    errors = []
+    for a, b in zip(arrays, reference):
+        if a is not None and b is not None:
+            visible = (a[:, 2] > 0.5) & (b[:, 2] > 0.5)
+            errors.extend(np.linalg.norm(a[visible, :2] - b[visible, :2], axis=1))
+    return float(np.mean(errors)) if errors else float("nan")
+
+
+def score_all(path, out_dir, options):
+    pushups, _ = pushup_counter(path, os.path.join(out_dir, "p.mp4"), backend_options=options)
+    good, bad, _ = situp_counter(path, os.path.join(out_dir, "s.mp4"), backend_options=options)
+    reach, _ = sit_and_reach_tracker(path, os.path.join(out_dir, "r.mp4"), backend_options=options)
+    _, heights = detect_jumps_autoheight(path, os.path.join(out_dir, "j.mp4"), backend_options=options)
+    return {"pushups": pushups, "situps": (good, bad), "reach_cm": round(float(reach)),
+            "jumps": len(heights)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=None, help="ONNX Runtime intra-op threads")
+    parser.add_argument("videos", nargs="*")
+    args = parser.parse_args()
+    paths = args.videos or sorted(glob.glob(os.path.join("static", "uploads", "conv_*.mp4")))
+
+    all_configs = configs(args.threads)
+    for name, options in list(all_configs.items()):
+        try:
+            pose = create_pose_backend(**options)
+        except (ImportError, OSError) as e:
+            print(f"Skipping {name}: {e}")
+            del all_configs[name]
+            continue
+        pose.close()
+        # MediaPipe falls back to the full model when another one can't be downloaded
+        if getattr(pose, "model_complexity", None) not in (None, options.get("model_complexity")):
+            print(f"Skipping {name}: model not available")
+            del all_configs[name]
+
+    out_dir = tempfile.mkdtemp()
+    fps = {name: [] for name in all_configs}
+    errors = {name: [] for name in all_configs}
+    agree = {name: 0 for name in all_configs}
+    total = 0
+    for path in paths:
+        frames = read_frames(path)
+        runs = {name: run_pose(options, frames) for name, options in all_configs.items()}
+        scores = {name: score_all(path, out_dir, options) for name, options in all_configs.items()}
+        print(f"\n{os.path.basename(path)}: {len(frames)} frames")
+        for name in all_configs:
+            fps[name].append(runs[name][0])
+            errors[name].append(landmark_error(runs[name][1], runs[REFERENCE][1]))
+            agree[name] += sum(scores[name][k] == v for k, v in scores[REFERENCE].items())
+            print(f"  {name:<16} {runs[name][0]:7.1f} fps  {scores[name]}")
+        total += len(scores[REFERENCE])
+
+    print(f"\n{'backend':<16} {'fps':>7} {'landmark err px':>16} {'scores agree':>13}")
+    for name in all_configs:
+        print(f"{name:<16} {np.mean(fps[name]):7.1f} {np.nanmean(errors[name]):16.2f} {agree[name]:>8}/{total}")
+
+
+if __name__ == "__main__":
+    main()
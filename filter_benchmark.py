@@ -0,0 +1,270 @@
+"""
+Accuracy benchmark for the landmark filter stage.
+
+For each clip it reports landmark jitter (mean absolute frame-to-frame
+acceleration, in px) before and after LandmarkFilter, how far the filtered
+track sits from the raw one on visible landmarks, the filter's cost per
+frame, and the scores of all four analyzers three ways:
+  - baseline:   the scorers as they were before the filter stage (no smoothing, the sit-up
+                5-sample mean, the per-frame jump scale, the first-frame reach scale)
+  - unfiltered: the current analyzers with smooth=False
+  - filtered:   the current analyzers with smooth=True
+
+The sample clips contain no reps or jumps, so it also scores synthetic landmark
+tracks with known counts (push-ups, sit-ups, jumps) with detector-like noise and
+occluded joints, over several random seeds.
+
+Usage: python filter_benchmark.py [video ...]   (defaults to static/uploads/conv_*.mp4)
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+from collections import deque
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from landmark_filter import LandmarkFilter, Point
+from pushup_counter import PushupCounter, pushup_counter
+from sit_ups        import SitupCounter, situp_counter
+from sit_and_reach  import SCALE_FRAMES, ReachTracker, sit_and_reach_tracker
+from vertical_jump  import JumpDetector, detect_jumps_autoheight
+
+mp_pose = mp.solutions.pose
+L = mp_pose.PoseLandmark
+
+BASELINE_SITUP_WINDOW = 5  # Hip angles the sit-up counter averaged before the filter stage
+
+# Synthetic ground-truth tracks
+SYNTH_FPS = 30
+SYNTH_SIZE = (640, 480)
+SYNTH_COUNT = 8           # Reps or jumps per track
+SYNTH_RUNS = 20           # Random seeds per track
+NOISE_PX = 3              # Per-landmark position noise
+OCCLUSION_RATE = 0.05     # Chance per landmark per frame of a low-visibility wild guess
+OCCLUSION_PX = 60         # Size of that guess's error
+VIS_GUESS_MAX = 0.3       # Visibility MediaPipe gives such a guess
+
+
+def read_landmarks(path, confidence=0.5):
+    """Runs pose once over the clip; returns per-frame landmark lists (None if no pose), fps, size."""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    w, h = int(cap.get(3)), int(cap.get(4))
+    frames = []
+    with mp_pose.Pose(min_detection_confidence=confidence, min_tracking_confidence=confidence) as pose:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            frames.append(list(results.pose_landmarks.landmark) if results.pose_landmarks else None)
+    cap.release()
+    return frames, fps, w, h
+
+
+def to_array(frames, w, h):
+    """Stacks landmark lists into (frames, 33, 3) arrays of x px, y px, visibility; NaN where missing."""
+    arr = np.full((len(frames), 33, 3), np.nan)
+    for i, lm in enumerate(frames):
+        if lm:
+            arr[i] = [(p.x * w, p.y * h, p.visibility) for p in lm]
+    return arr
+
+
+def jitter(arr):
+    """Mean absolute second difference of visible landmark positions, in px."""
+    acc = np.abs(arr[2:, :, :2] - 2 * arr[1:-1, :, :2] + arr[:-2, :, :2])
+    visible = (arr[2:, :, 2] > 0.5) & (arr[1:-1, :, 2] > 0.5) & (arr[:-2, :, 2] > 0.5)
+    return float(np.nanmean(acc[visible])) if visible.any() else float("nan")
+
+
+# ------------------ Pre-filter baseline ------------------
+# The scorers as they were before the landmark filter stage; push-ups are unchanged
+class BaselineSitupCounter(SitupCounter):
+    """Sit-up counter on the mean of the last few hip angles."""
+
+    def __init__(self):
+        super().__init__()
+        self.hip_angles = deque(maxlen=BASELINE_SITUP_WINDOW)
+
+    def update(self, hip_angle):
+        self.hip_angles.append(hip_angle)
+        super().update(np.mean(self.hip_angles))
+
+
+class BaselineJumpDetector(JumpDetector):
+    """Jump detector that rescales every frame from that frame's nose-to-ankle height."""
+
+    def process(self, lm, w, h):
+        self.scale_cm_per_px = None
+        super().process(lm, w, h)
+
+
+class BaselineReachTracker(ReachTracker):
+    """Reach tracker whose scale is locked from the first frame's hip-to-ankle length."""
+
+    def process(self, lm, w, h):
+        super().process(lm, w, h)
+        if self.scale_samples:
+            self.scale_samples = self.scale_samples[:1] * SCALE_FRAMES
+
+
+def baseline_scores(path):
+    """Scores a clip's unsmoothed landmarks with the baseline scorers, at each test's old pose confidence."""
+    frames, _, w, h = read_landmarks(path, confidence=0.5)
+    pushups, situps, jumps = PushupCounter(), BaselineSitupCounter(), BaselineJumpDetector()
+    for lm in filter(None, frames):
+        for scorer in (pushups, situps, jumps):
+            scorer.process(lm, w, h)
+    reach = BaselineReachTracker()
+    frames, _, w, h = read_landmarks(path, confidence=0.7)
+    for lm in filter(None, frames):
+        reach.process(lm, w, h)
+    return {"pushups": pushups.count, "situps": f"{situps.valid_reps}/{situps.reps - situps.valid_reps}",
+            "reach_cm": round(float(reach.max_reach_cm), 1),
+            "jumps_cm": [round(float(x), 1) for x in jumps.jump_heights]}
+
+
+def score_all(path, out_dir, smooth):
+    """Scores a clip with the current analyzers, with or without the filter stage."""
+    pushups, _ = pushup_counter(path, os.path.join(out_dir, "p.mp4"), smooth=smooth)
+    good, bad, _ = situp_counter(path, os.path.join(out_dir, "s.mp4"), smooth=smooth)
+    reach, _ = sit_and_reach_tracker(path, os.path.join(out_dir, "r.mp4"), smooth=smooth)
+    _, heights = detect_jumps_autoheight(path, os.path.join(out_dir, "j.mp4"), smooth=smooth)
+    return {"pushups": pushups, "situps": f"{good}/{bad}", "reach_cm": round(float(reach), 1),
+            "jumps_cm": [round(float(x), 1) for x in heights]}
+
+
+# ------------------ Synthetic ground truth ------------------
+def rep_angles(count, fps, top, bottom, period_s=2.0, rest_s=1.0):
+    """Joint angle for `count` reps from top to bottom and back, with a rest at each end."""
+    rest = np.full(int(rest_s * fps), float(top))
+    t = np.arange(int(count * period_s * fps)) / fps
+    reps = (top + bottom) / 2 + (top - bottom) / 2 * np.cos(2 * np.pi * t / period_s)
+    return np.concatenate([rest, reps, rest])
+
+
+def pushup_pose(angle):
+    """Side-on plank with both elbows at `angle` degrees."""
+    pts = np.tile([320.0, 240.0], (33, 1))
+    a = np.radians(angle)
+    for shoulder, elbow, wrist in ((L.LEFT_SHOULDER, L.LEFT_ELBOW, L.LEFT_WRIST),
+                                   (L.RIGHT_SHOULDER, L.RIGHT_ELBOW, L.RIGHT_WRIST)):
+        pts[elbow] = pts[shoulder] + (0, 80)
+        pts[wrist] = pts[elbow] + 80 * np.array([np.sin(a), -np.cos(a)])
+    return pts
+
+
+def situp_pose(angle):
+    """Lying figure whose shoulder-hip-knee angle is `angle` degrees on both sides."""
+    pts = np.tile([320.0, 360.0], (33, 1))
+    a = np.radians(angle)
+    for shoulder, knee in ((L.LEFT_SHOULDER, L.LEFT_KNEE), (L.RIGHT_SHOULDER, L.RIGHT_KNEE)):
+        pts[knee] = pts[L.LEFT_HIP] + (120, 0)
+        pts[shoulder] = pts[L.LEFT_HIP] + 140 * np.array([np.cos(a), -np.sin(a)])
+    return pts
+
+
+def jump_offsets(count, fps, height_px=50, air_s=0.4, ground_s=1.6):
+    """Upward body offset for `count` parabolic jumps separated by standing time."""
+    ground = np.zeros(int(ground_s * fps))
+    t = np.linspace(0, 1, int(air_s * fps))
+    jump = 4 * height_px * t * (1 - t)
+    return np.concatenate([ground] + [np.concatenate([jump, ground]) for _ in range(count)])
+
+
+def standing_pose(offset):
+    """Standing figure 360 px tall (nose to ankles), lifted by `offset` px."""
+    pts = np.tile([320.0, 240.0 - offset], (33, 1))
+    pts[L.NOSE, 1] = 60 - offset
+    pts[[L.LEFT_ANKLE, L.RIGHT_ANKLE], 1] = 420 - offset
+    return pts
+
+
+def synthetic_track(kind, count, rng, fps=SYNTH_FPS):
+    """Per-frame landmark lists for `count` push-ups, sit-ups or jumps, as a pose detector might report them."""
+    w, h = SYNTH_SIZE
+    if kind == "pushups":
+        truth = [pushup_pose(a) for a in rep_angles(count, fps, top=175, bottom=70)]
+    elif kind == "situps":
+        truth = [situp_pose(a) for a in rep_angles(count, fps, top=175, bottom=60)]
+    else:
+        truth = [standing_pose(o) for o in jump_offsets(count, fps)]
+
+    frames = []
+    for pts in truth:
+        pts = pts + rng.normal(0, NOISE_PX, pts.shape)
+        vis = np.full(len(pts), 0.95)
+        hidden = rng.random(len(pts)) < OCCLUSION_RATE
+        pts[hidden] += rng.normal(0, OCCLUSION_PX, (hidden.sum(), 2))
+        vis[hidden] = rng.uniform(0.05, VIS_GUESS_MAX, hidden.sum())
+        frames.append([Point(x / w, y / h, v) for (x, y), v in zip(pts, vis)])
+    return frames
+
+
+def count_track(frames, scorer, smooth, fps=SYNTH_FPS):
+    w, h = SYNTH_SIZE
+    smoother = LandmarkFilter(fps, enabled=smooth)
+    for lm in frames:
+        scorer.process(smoother.update(lm), w, h)
+    if hasattr(scorer, "jump_heights"):
+        return len(scorer.jump_heights)
+    return getattr(scorer, "valid_reps", getattr(scorer, "count", None))
+
+
+def ground_truth():
+    """Scores the synthetic tracks; prints mean count and how often it is exact, per pipeline."""
+    scorers = {
+        "pushups": (PushupCounter, PushupCounter),
+        "situps": (BaselineSitupCounter, SitupCounter),
+        "jumps": (BaselineJumpDetector, JumpDetector),
+    }
+    print(f"\nSynthetic tracks: {SYNTH_COUNT} per track, {SYNTH_RUNS} seeds, "
+          f"{NOISE_PX} px noise, {OCCLUSION_RATE:.0%} occluded landmarks")
+    print(f"  {'track':<8} {'baseline':>16} {'unfiltered':>16} {'filtered':>16}   (mean count, exact runs)")
+    for kind, (old, new) in scorers.items():
+        counts = {"baseline": [], "unfiltered": [], "filtered": []}
+        for seed in range(SYNTH_RUNS):
+            frames = synthetic_track(kind, SYNTH_COUNT, np.random.default_rng(seed))
+            counts["baseline"].append(count_track(frames, old(), smooth=False))
+            counts["unfiltered"].append(count_track(frames, new(), smooth=False))
+            counts["filtered"].append(count_track(frames, new(), smooth=True))
+        cells = [f"{np.mean(c):6.2f} {sum(x == SYNTH_COUNT for x in c):>3}/{SYNTH_RUNS}" for c in counts.values()]
+        print(f"  {kind:<8} " + " ".join(f"{c:>16}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="*")
+    args = parser.parse_args()
+    paths = args.videos or sorted(glob.glob(os.path.join("static", "uploads", "conv_*.mp4")))
+
+    out_dir = tempfile.mkdtemp()
+    for path in paths:
+        frames, fps, w, h = read_landmarks(path)
+        raw = to_array(frames, w, h)
+
+        smoother = LandmarkFilter(fps)
+        start = time.perf_counter()
+        filtered_frames = [smoother.update(lm) for lm in frames]
+        cost_us = (time.perf_counter() - start) / max(len(frames), 1) * 1e6
+        filtered = to_array(filtered_frames, w, h)
+
+        visible = raw[..., 2] > 0.5
+        deviation = np.nanmean(np.abs(filtered[..., :2] - raw[..., :2])[visible]) if visible.any() else float("nan")
+        print(f"\n{os.path.basename(path)}: {len(frames)} frames @ {fps:.1f} fps")
+        print(f"  jitter raw {jitter(raw):.2f} px -> filtered {jitter(filtered):.2f} px"
+              f" | mean deviation {deviation:.2f} px | filter {cost_us:.0f} us/frame")
+        print(f"  scores baseline   {baseline_scores(path)}")
+        print(f"  scores unfiltered {score_all(path, out_dir, smooth=False)}")
+        print(f"  scores filtered   {score_all(path, out_dir, smooth=True)}")
+
+    ground_truth()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import os
 import uuid
 import subprocess
 import numpy as np
-from flask import Flask, render_template, request, jsonify, url_for
+from flask import Flask, render_template, request, jsonify, url_for, send_from_directory
 from werkzeug.utils import secure_filename
 
 # import your push-up counter function
@@ -10,12 +10,14 @@ from pushup_counter import pushup_counter
 from vertical_jump  import detect_jumps_autoheight
 from sit_ups        import situp_counter
 from sit_and_reach  import sit_and_reach_tracker
+from group_tracker  import group_analyzer, MAX_PEOPLE
+from analysis_budget import AnalysisBudget
 
 app = Flask(__name__)
 
-# folders
-UPLOAD_FOLDER = os.path.join("static", "uploads")
-OUTPUT_FOLDER = os.path.join("static", "outputs")
+# folders (override with the UPLOAD_FOLDER / OUTPUT_FOLDER environment variables)
+UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", os.path.join("static", "uploads"))
+OUTPUT_FOLDER = os.getenv("OUTPUT_FOLDER", os.path.join("static", "outputs"))
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
@@ -23,26 +25,30 @@ os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
 ALLOWED_EXTS = {"mp4", "mov", "avi", "webm", "mkv"}
 
-# ⚡ Full path to ffmpeg.exe (update if needed)
-FFMPEG_PATH = "ffmpeg"
+# ⚡ Full path to ffmpeg.exe (set the FFMPEG_PATH environment variable if it is not on PATH)
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTS
 
-def convert_webm_to_mp4(input_path, output_path):
+def convert_webm_to_mp4(input_path, output_path, max_duration_s=None, timeout=None):
     """
     Convert webm (or other input) to mp4 using ffmpeg if available.
+    Only the first max_duration_s seconds are kept, and ffmpeg is killed after timeout seconds.
     """
-    cmd = [
-        FFMPEG_PATH, "-y", "-i", input_path,
+    cmd = [FFMPEG_PATH, "-y", "-i", input_path]
+    if max_duration_s:
+        # One extra second so the analyzer reaches the limit itself and flags the result
+        cmd += ["-t", str(max_duration_s + 1)]
+    cmd += [
         "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
         "-c:a", "aac", "-b:a", "128k",
         output_path
     ]
     try:
-        subprocess.check_call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.check_call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
         return True
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
         return False
 
 # fitness level functions or parameters for each test
@@ -224,6 +230,25 @@ def get_situp_level(count, age, gender):
         else: return "N/A"
     return "N/A"
 
+def get_person_results(test_type, scorer, age, gender):
+    """
+    Builds the per-athlete result entry for group mode from that athlete's scorer.
+    """
+    if test_type == "pushups":
+        return {"score": scorer.count, "level": get_pushup_level(scorer.count, age, gender)}
+    elif test_type == "situps":
+        bad = scorer.reps - scorer.valid_reps
+        return {"score": scorer.valid_reps, "level": get_situp_level(scorer.valid_reps, age, gender), "secondary_score": bad, "secondary_score_label": "Bad Reps"}
+    elif test_type == "sit_and_reach":
+        reach = scorer.max_reach_cm
+        return {"score": f"{reach:.1f} cm", "level": get_reach_level(reach, age, gender)}
+    elif test_type == "vertical_jump":
+        heights = scorer.jump_heights
+        avg_jump = round(np.mean(heights), 1) if heights else 0
+        return {"score": f"{avg_jump} cm", "level": get_jump_level(avg_jump, age, gender)}
+
+TEST_LABELS = {"pushups": "Push-ups", "situps": "Sit-ups", "sit_and_reach": "Sit and Reach", "vertical_jump": "Vertical Jump"}
+
 @app.route("/")
 def index():
     """Serves the main HTML page. Assumes you have an index.html in a 'templates' folder."""
@@ -231,6 +256,11 @@ def index():
     # It's best practice to create a 'templates' folder and put index.html inside it.
     return render_template("index.html")
 
+@app.route("/outputs/<path:filename>")
+def output_video(filename):
+    """Serves analyzed videos from OUTPUT_FOLDER, wherever it is configured."""
+    return send_from_directory(os.path.abspath(OUTPUT_FOLDER), filename)
+
 @app.route("/analyze", methods=["POST"])
 def analyze_video():
     """
@@ -244,18 +274,26 @@ def analyze_video():
     age = request.form.get("age", type=int)
     gender = request.form.get("gender")
     test_type = request.form.get("test_type")
+    # Group mode: several athletes in one clip, optionally standing in fixed lanes
+    group_mode = request.form.get("mode") == "group"
+    lanes = request.form.get("lanes", type=int)
 
     if file.filename == "": return jsonify(error="No video selected"), 400
     if not all([age, gender, test_type]): return jsonify(error="Missing required form data"), 400
     if not allowed_file(file.filename): return jsonify(error="Invalid file type"), 400
+    if request.form.get("lanes") and not (lanes and 1 <= lanes <= MAX_PEOPLE):
+        return jsonify(error=f"lanes must be a whole number from 1 to {MAX_PEOPLE}"), 400
 
     filename = secure_filename(file.filename)
     unique_id = str(uuid.uuid4())[:8]
     input_path = os.path.join(UPLOAD_FOLDER, f"upload_{unique_id}_{filename}")
     file.save(input_path)
 
+    # Per-test limits on video length, time without a person, and total wall-clock time
+    budget = AnalysisBudget.for_test(test_type)
+
     converted_path = os.path.join(UPLOAD_FOLDER, f"conv_{unique_id}.mp4")
-    if not convert_webm_to_mp4(input_path, converted_path):
+    if not convert_webm_to_mp4(input_path, converted_path, budget.max_duration_s, budget.remaining()):
         return jsonify(error="Video conversion failed. Check FFMPEG path and file integrity."), 500
 
     output_path = os.path.join(OUTPUT_FOLDER, f"output_{unique_id}.mp4")
@@ -263,28 +301,41 @@ def analyze_video():
     
     try:
         # This block calls the correct function based on the test_type from the frontend
-        if test_type == "pushups":
-            count, final_path = pushup_counter(converted_path, output_path)
+        if group_mode:
+            if test_type not in TEST_LABELS:
+                return jsonify(error=f"Unknown test type: {test_type}"), 400
+            scorers, final_path = group_analyzer(converted_path, output_path, test_type, num_lanes=lanes, budget=budget)
+            people = [dict(id=track_id, **get_person_results(test_type, scorer, age, gender))
+                      for track_id, scorer in scorers.items()]
+            results = {"score_type": TEST_LABELS[test_type], "people": people}
+
+        elif test_type == "pushups":
+            count, final_path = pushup_counter(converted_path, output_path, budget=budget)
             results = {"score_type": "Push-ups", "score": count, "level": get_pushup_level(count, age, gender)}
         
         elif test_type == "situps":
-            valid, bad, final_path = situp_counter(converted_path, output_path)
+            valid, bad, final_path = situp_counter(converted_path, output_path, budget=budget)
             results = {"score_type": "Sit-ups", "score": valid, "level": get_situp_level(valid, age, gender), "secondary_score": bad, "secondary_score_label": "Bad Reps"}
 
         elif test_type == "sit_and_reach":
-            reach, final_path = sit_and_reach_tracker(converted_path, output_path)
+            reach, final_path = sit_and_reach_tracker(converted_path, output_path, budget=budget)
             results = {"score_type": "Sit and Reach", "score": f"{reach:.1f} cm", "level": get_reach_level(reach, age, gender)}
 
         elif test_type == "vertical_jump":
-            final_path, heights = detect_jumps_autoheight(converted_path, output_path)
+            final_path, heights = detect_jumps_autoheight(converted_path, output_path, budget=budget)
             avg_jump = round(np.mean(heights), 1) if heights else 0
             results = {"score_type": "Vertical Jump", "score": f"{avg_jump} cm", "level": get_jump_level(avg_jump, age, gender)}
         
         else:
             return jsonify(error=f"Unknown test type: {test_type}"), 400
             
+        # Flag results from an analysis that a budget cut short
+        results['partial'] = budget.partial
+        if budget.partial:
+            results['stop_reason'] = budget.stop_reason
+
         # The '_external=True' is important for the frontend to get the full URL
-        results['video_url'] = url_for("static", filename=f"outputs/{os.path.basename(final_path)}", _external=True)
+        results['video_url'] = url_for("output_video", filename=os.path.basename(final_path), _external=True)
 
     except Exception as e:
         print(f"Error processing {test_type}: {e}")
@@ -0,0 +1,125 @@
+"""
+Group mode benchmark: one group_analyzer run over N athletes versus N single-person runs.
+
+For N = 1, 2, 3, 5 it puts N sample clips (each looped to --frames frames, and resampled to
+--fps, a phone camera's frame rate, since the sample uploads are 10 fps) side by side
+on one fixed-size camera frame, as a single camera filming the whole line would, and times:
+  - single: the test's single-person analyzer run once on each athlete's own clip
+  - lanes:  group_analyzer with num_lanes=N
+  - detect: group_analyzer finding the athletes itself
+and reports how many people group mode tracked.
+
+The camera frame is decoded, searched and written once however many athletes are in it,
+and each region costs one landmarker call per posed frame. Landmark inference itself still
+runs once per athlete, at up to group_tracker.POSE_FPS instead of every frame, which is
+where most of the saving over N separate uploads comes from.
+
+Usage: python group_benchmark.py [--test-type pushups] [--frames 60] [--fps 30] [video ...]
+       (defaults to static/uploads/conv_*.mp4)
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from group_tracker  import group_analyzer
+from pushup_counter import pushup_counter
+from sit_ups        import situp_counter
+from sit_and_reach  import sit_and_reach_tracker
+from vertical_jump  import detect_jumps_autoheight
+
+SINGLE = {
+    "pushups": pushup_counter,
+    "situps": situp_counter,
+    "sit_and_reach": sit_and_reach_tracker,
+    "vertical_jump": detect_jumps_autoheight,
+}
+GROUP_SIZES = (1, 2, 3, 5)
+CAMERA_SIZE = (1920, 480)  # one wide camera filming the whole line
+
+
+def looped_frames(path, size, n, fps):
+    """The clip played forwards then backwards until it has n frames at fps, resized to size."""
+    cap = cv2.VideoCapture(path)
+    src_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, size))
+    cap.release()
+    seq = frames + frames[::-1]
+    return [seq[int(i * src_fps / fps) % len(seq)] for i in range(n)]
+
+
+def camera_frame(frames):
+    """The athletes' frames side by side on a CAMERA_SIZE canvas, each shrunk to fit its slot if needed."""
+    cw, ch = CAMERA_SIZE
+    canvas = np.zeros((ch, cw, 3), np.uint8)
+    slot = cw // len(frames)
+    for i, frame in enumerate(frames):
+        h, w = frame.shape[:2]
+        scale = min(slot / w, ch / h, 1)
+        frame = cv2.resize(frame, (int(w * scale), int(h * scale)))
+        x, y = i * slot + (slot - frame.shape[1]) // 2, (ch - frame.shape[0]) // 2
+        canvas[y:y + frame.shape[0], x:x + frame.shape[1]] = frame
+    return canvas
+
+
+def write_clip(path, frames, fps):
+    h, w = frames[0].shape[:2]
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+    for frame in frames:
+        out.write(frame)
+    out.release()
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--test-type", default="pushups", choices=sorted(SINGLE))
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("videos", nargs="*")
+    args = parser.parse_args()
+    paths = args.videos or sorted(glob.glob(os.path.join("static", "uploads", "conv_*.mp4")))
+
+    cap = cv2.VideoCapture(paths[0])
+    size = (int(cap.get(3)), int(cap.get(4)))
+    cap.release()
+    fps = args.fps
+
+    work_dir = tempfile.mkdtemp()
+    people = [looped_frames(p, size, args.frames, fps) for p in paths]
+    singles = []
+    for i, frames in enumerate(people):
+        singles.append(os.path.join(work_dir, f"person{i}.mp4"))
+        write_clip(singles[-1], frames, fps)
+    output = os.path.join(work_dir, "out.mp4")
+
+    print(f"{'people':>6} {'single s':>9} {'lanes s':>8} {'detect s':>9} {'lanes/single':>13} "
+          f"{'detect/single':>14} {'tracked':>8}")
+    for n in GROUP_SIZES:
+        chosen = [i % len(people) for i in range(n)]
+        group_path = os.path.join(work_dir, f"group{n}.mp4")
+        write_clip(group_path, [camera_frame([people[i][t] for i in chosen]) for t in range(args.frames)], fps)
+
+        single_s = sum(timed(SINGLE[args.test_type], singles[i], output)[0] for i in chosen)
+        lanes_s, _ = timed(group_analyzer, group_path, output, args.test_type, num_lanes=n)
+        detect_s, (scorers, _) = timed(group_analyzer, group_path, output, args.test_type)
+        print(f"{n:>6} {single_s:>9.2f} {lanes_s:>8.2f} {detect_s:>9.2f} {lanes_s / single_s:>13.2f} "
+              f"{detect_s / single_s:>14.2f} {len(scorers):>6}/{n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+from mediapipe.tasks.python import BaseOptions, vision
+
+from landmark_filter import LandmarkFilter, Point
+from pose_backend    import build_pose_landmarker_task
+from pushup_counter import PushupCounter
+from sit_ups        import SitupCounter
+from sit_and_reach  import ReachTracker
+from vertical_jump  import JumpDetector
+
+mp_pose = mp.solutions.pose
+mp_drawing = mp.solutions.drawing_utils
+
+# ------------------ Thresholds and Constants ------------------
+DETECT_EVERY = 10        # Regions with nobody in them are searched only every N frames
+MIN_DETECTION_CONFIDENCE = 0.5
+MIN_TRACKING_CONFIDENCE = 0.5
+POSE_FPS = 15            # Each athlete's pose is refreshed at most this often; the scorers only need reps and peaks
+POSES_PER_TILE = 1       # Poses one detection tile looks for (see Region)
+TILE_ASPECT = 1.5        # Frames wider (or taller) than this are split into tiles
+TILE_OVERLAP = 0.25      # Overlap between neighbouring tiles
+MAX_PEOPLE = 10          # Most athletes tracked in one clip
+MATCH_DIST_TH = 0.5      # Max hip-centre distance, as a fraction of body size, to match a pose to a track
+MAX_MISSED_S = 1.0       # Drop a track after this many seconds without a matching pose
+MIN_TRACK_FRAMES = 15    # Tracks with fewer posed frames are treated as false detections
+
+# One scorer per person; each exposes process(lm, w, h)
+SCORERS = {
+    "pushups": PushupCounter,
+    "situps": SitupCounter,
+    "sit_and_reach": ReachTracker,
+    "vertical_jump": JumpDetector,
+}
+
+# ------------------ Helper Functions ------------------
+def centre_distance(a, b):
+    """
+    Distance between the centres of two (x1, y1, x2, y2) person boxes, relative to the smaller one.
+    Whole-body boxes of athletes side by side overlap a lot, so this separates them better than IoU.
+    """
+    ax, ay, bx, by = (a[0] + a[2]) / 2, (a[1] + a[3]) / 2, (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+    size = min(a[2] - a[0], b[2] - b[0]) / 2
+    return np.hypot(ax - bx, ay - by) / size if size > 0 else np.inf
+
+
+def pose_box(lm, w, h):
+    """Square box centred on the hips and enclosing every landmark, in frame pixels."""
+    pts = np.array([(p.x * w, p.y * h) for p in lm])
+    centre = (pts[mp_pose.PoseLandmark.LEFT_HIP] + pts[mp_pose.PoseLandmark.RIGHT_HIP]) / 2
+    radius = np.linalg.norm(pts - centre, axis=1).max()
+    return (centre[0] - radius, centre[1] - radius, centre[0] + radius, centre[1] + radius)
+
+
+def tiles(w, h):
+    """Overlapping square tiles along the long side of the frame, or the whole frame if it is near square."""
+    side = min(w, h)
+    if max(w, h) <= side * TILE_ASPECT:
+        return [(0, 0, w, h)]
+    stride = int(side * (1 - TILE_OVERLAP))
+    starts = list(range(0, max(w, h) - side, stride)) + [max(w, h) - side]
+    if w > h:
+        return [(x, 0, x + side, h) for x in starts]
+    return [(0, y, w, y + side) for y in starts]
+
+
+def lane_boxes(num_lanes, w, h):
+    """Split the frame into equal vertical lanes, one per athlete standing in a line."""
+    edges = np.linspace(0, w, num_lanes + 1).astype(int)
+    return [(edges[i], 0, edges[i + 1], h) for i in range(num_lanes)]
+
+
+# ------------------ Region Class ------------------
+class Region:
+    """
+    A fixed part of the frame (a lane or a detection tile) watched by one multi-person
+    PoseLandmarker in VIDEO mode, which tracks the poses it finds from frame to frame.
+    The landmarker drops poses whose body regions overlap, so athletes side by side are only
+    told apart when each is mostly in a region of their own. Each frame costs one landmark model
+    run per tracked pose, plus a person-detector run while the region has fewer than num_poses.
+    """
+
+    def __init__(self, box, num_poses):
+        self.box = box
+        options = vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=build_pose_landmarker_task()),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=num_poses,
+            min_pose_detection_confidence=MIN_DETECTION_CONFIDENCE,
+            min_pose_presence_confidence=MIN_TRACKING_CONFIDENCE,
+            min_tracking_confidence=MIN_TRACKING_CONFIDENCE)
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+        self.empty = False
+
+    def detect(self, rgb, pose_idx, timestamp_ms):
+        """Returns this frame's poses in the region as lists of Points in full-frame coordinates."""
+        # Nobody here last time: only look again every DETECT_EVERY posed frames
+        if self.empty and pose_idx % DETECT_EVERY:
+            return []
+        h, w = rgb.shape[:2]
+        x1, y1, x2, y2 = self.box
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb[y1:y2, x1:x2]))
+        result = self.landmarker.detect_for_video(image, timestamp_ms)
+        poses = [[Point((x1 + p.x * (x2 - x1)) / w, (y1 + p.y * (y2 - y1)) / h, p.visibility) for p in pose]
+                 for pose in result.pose_landmarks]
+        self.empty = not poses
+        return poses
+
+    def close(self):
+        self.landmarker.close()
+
+
+def merge_poses(region_poses, regions, w, h):
+    """
+    Joins the poses found in overlapping tiles. A person in the overlap is found twice; keep
+    the pose whose hips are nearest the centre of their tile, where the whole body is in view.
+    """
+    found = []
+    for region, poses in zip(regions, region_poses):
+        rx, ry = (region.box[0] + region.box[2]) / 2, (region.box[1] + region.box[3]) / 2
+        for pose in poses:
+            box = pose_box(pose, w, h)
+            offset = np.hypot((box[0] + box[2]) / 2 - rx, (box[1] + box[3]) / 2 - ry)
+            found.append((offset, box, pose))
+
+    kept = []
+    for offset, box, pose in sorted(found, key=lambda f: f[0]):
+        if all(centre_distance(box, other) > MATCH_DIST_TH for other, _ in kept):
+            kept.append((box, pose))
+    return kept[:MAX_PEOPLE]
+
+
+# ------------------ Track Class ------------------
+class Track:
+    """One athlete: a stable ID, where they were last seen, their smoother and scorer."""
+
+    def __init__(self, track_id, test_type, fps):
+        self.id = track_id
+        self.box = None
+        self.missed = 0
+        self.frames_seen = 0
+        self.scorer = SCORERS[test_type]()
+        self.smoother = LandmarkFilter(fps)
+        self.pose = None  # this frame's raw landmarks, for drawing
+
+    def update(self, pose, w, h):
+        """Feeds this frame's pose (None if the athlete wasn't found) to the smoother and scorer."""
+        self.pose = pose
+        lm = self.smoother.update(pose)
+        if lm is None:
+            self.missed += 1
+            return
+        self.missed = 0
+        self.box = pose_box(pose, w, h)
+        self.scorer.process(lm, w, h)
+        self.frames_seen += 1
+
+    def draw(self, frame):
+        """Draws this frame's skeleton and the track ID onto the output frame."""
+        if self.pose is None:
+            return
+        landmarks = landmark_pb2.NormalizedLandmarkList()
+        for p in self.pose:
+            landmarks.landmark.add(x=p.x, y=p.y, visibility=p.visibility)
+        mp_drawing.draw_landmarks(frame, landmarks, mp_pose.POSE_CONNECTIONS)
+        h, w = frame.shape[:2]
+        x1, y1 = int(np.clip(self.box[0], 0, w - 60)), int(np.clip(self.box[1], 0, h - 30))
+        cv2.putText(frame, f"#{self.id}", (x1 + 5, y1 + 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+
+
+# ------------------ Tracker Class ------------------
+class PersonTracker:
+    """Greedy nearest-hip-centre tracker that keeps stable per-person IDs from frame to frame."""
+
+    def __init__(self, test_type, fps):
+        self.test_type = test_type
+        self.fps = fps
+        self.max_missed = int(MAX_MISSED_S * fps)
+        self.tracks = []
+        self.finished = []
+        self.next_id = 1
+
+    def add_track(self):
+        track = Track(self.next_id, self.test_type, self.fps)
+        self.tracks.append(track)
+        self.next_id += 1
+        return track
+
+    def update(self, found, w, h):
+        """Matches this frame's (box, pose) pairs to tracks, starting tracks for new people."""
+        pairs = sorted((centre_distance(t.box, box), ti, pi) for ti, t in enumerate(self.tracks)
+                       for pi, (box, _) in enumerate(found) if t.box is not None)
+        matched = {}
+        for dist, ti, pi in pairs:
+            if dist > MATCH_DIST_TH:
+                break
+            if ti in matched or pi in matched.values():
+                continue
+            matched[ti] = pi
+
+        for ti, track in enumerate(self.tracks):
+            track.update(found[matched[ti]][1] if ti in matched else None, w, h)
+
+        # Retire lost tracks but keep their scores
+        self.finished.extend(t for t in self.tracks if t.missed > self.max_missed)
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+
+        for pi, (_, pose) in enumerate(found):
+            if pi not in matched.values() and len(self.tracks) < MAX_PEOPLE:
+                self.add_track().update(pose, w, h)
+
+    def close(self):
+        self.finished.extend(self.tracks)
+        self.tracks = []
+        return sorted(self.finished, key=lambda t: t.id)
+
+
+# ------------------ Main Processing Function ------------------
+def group_analyzer(input_path, output_path="output_group.mp4", test_type="pushups", num_lanes=None, budget=None):
+    """
+    Processes a video with several athletes doing the same test.
+    With num_lanes set, each athlete stands in a fixed lane; otherwise people are found anywhere
+    in the frame, which is split into tiles if it is wide. Every lane or tile gets one
+    PoseLandmarker call per posed frame however many athletes it holds. Landmark inference still
+    runs once per athlete, so poses are refreshed at POSE_FPS at most; the decode, person
+    detection and output video are shared (see group_benchmark.py for the cost against N runs).
+    Returns a {track_id: scorer} dict and the path to the output video.
+    """
+    if test_type not in SCORERS:
+        raise ValueError(f"Unknown test type: {test_type}")
+    if num_lanes is not None and not 1 <= num_lanes <= MAX_PEOPLE:
+        raise ValueError(f"num_lanes must be between 1 and {MAX_PEOPLE}")
+
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise IOError("Cannot open video file.")
+
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    w, h = int(cap.get(3)), int(cap.get(4))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    out = cv2.VideoWriter(output_path, fourcc, fps, (w, h))
+
+    # Frames in between keep the last poses on screen but are not scored
+    pose_step = max(1, round(fps / POSE_FPS))
+    tracker = PersonTracker(test_type, fps / pose_step)
+    regions = []
+    try:
+        if num_lanes:
+            regions = [Region(box, num_poses=1) for box in lane_boxes(num_lanes, w, h)]
+            lane_tracks = [tracker.add_track() for _ in regions]
+        else:
+            regions = [Region(box, POSES_PER_TILE) for box in tiles(w, h)]
+
+        frame_idx = 0
+        region_poses = []
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if frame_idx % pose_step == 0:
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                timestamp_ms = int(frame_idx * 1000 / fps)
+                region_poses = [region.detect(rgb, frame_idx // pose_step, timestamp_ms) for region in regions]
+                if num_lanes:
+                    # One athlete per lane, and the lane is their ID
+                    for track, poses in zip(lane_tracks, region_poses):
+                        track.update(poses[0] if poses else None, w, h)
+                else:
+                    tracker.update(merge_poses(region_poses, regions, w, h), w, h)
+
+            # Draw only once every region has been read
+            for track in tracker.tracks:
+                track.draw(frame)
+            out.write(frame)
+            frame_idx += 1
+
+            if budget and budget.exhausted(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000, any(region_poses)):
+                break
+    finally:
+        cap.release()
+        out.release()
+        for region in regions:
+            region.close()
+
+    tracks = [t for t in tracker.close() if t.frames_seen >= MIN_TRACK_FRAMES]
+    print(f"✅ Group analysis done: {len(tracks)} people tracked")
+    return {t.id: t.scorer for t in tracks}, output_path
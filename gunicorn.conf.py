@@ -0,0 +1,31 @@
+# Gunicorn settings for `gunicorn wsgi:app`, all overridable from the environment.
+import multiprocessing
+import os
+
+from analysis_budget import JOB_DEADLINE_S
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# Analysis is CPU-bound, so scale with processes; threads only help overlap uploads and chat calls
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.getenv("WEB_THREADS", 2))
+worker_class = "gthread"
+
+# Give a job its full analysis deadline plus time for upload and conversion before killing the worker
+timeout = int(os.getenv("WEB_TIMEOUT", JOB_DEADLINE_S + 60))
+graceful_timeout = 30
+
+# Recycle workers now and then to cap memory growth from MediaPipe/OpenCV
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 500))
+max_requests_jitter = 50
+
+accesslog = "-"
+
+
+def on_starting(server):
+    """Fetch the pose models once in the master, before any worker forks, so workers never download."""
+    from pose_backend import fetch_pose_models
+    try:
+        fetch_pose_models()
+    except OSError as e:
+        server.log.warning(f"Could not fetch pose models ({e}); workers will use the full model")
@@ -0,0 +1,93 @@
+import numpy as np
+from collections import namedtuple
+
+# Landmark in normalized frame coordinates (same fields the scorers read)
+Point = namedtuple("Point", ["x", "y", "visibility"])
+
+# ------------------ Thresholds and Constants ------------------
+MIN_CUTOFF = 1.0      # Hz; lower = smoother when still
+BETA = 10.0           # Speed coefficient; higher = less lag when moving fast
+D_CUTOFF = 1.0        # Hz; cutoff for the speed estimate
+VIS_LOW = 0.3         # At or below this visibility a landmark is held at its last estimate
+VIS_HIGH = 0.8        # At or above this visibility a landmark is filtered normally
+MAX_HOLD_FRAMES = 5   # A low-visibility landmark is held at most this many frames, then filtered normally
+MAX_GAP_S = 0.5       # Reset after this many seconds without a detected pose
+
+
+def _alpha(cutoff, freq):
+    tau = 1.0 / (2 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau * freq)
+
+
+# ------------------ One-Euro Filter ------------------
+class OneEuroFilter:
+    """
+    One-Euro filter over a numpy array of values, all updated at once.
+    `weight` (0..1, broadcastable) scales how far each value may move this step.
+    """
+
+    def __init__(self, freq, min_cutoff=MIN_CUTOFF, beta=BETA, d_cutoff=D_CUTOFF):
+        self.freq = freq
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x_prev = None
+        self.dx_prev = None
+
+    def __call__(self, x, weight=1.0):
+        if self.x_prev is None:
+            self.x_prev = x
+            self.dx_prev = np.zeros_like(x)
+            return x
+
+        dx = (x - self.x_prev) * self.freq
+        dx_hat = self.dx_prev + _alpha(self.d_cutoff, self.freq) * weight * (dx - self.dx_prev)
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        x_hat = self.x_prev + _alpha(cutoff, self.freq) * weight * (x - self.x_prev)
+
+        self.x_prev, self.dx_prev = x_hat, dx_hat
+        return x_hat
+
+
+# ------------------ Landmark Filter ------------------
+class LandmarkFilter:
+    """
+    Streaming smoother for MediaPipe pose landmarks, O(1) per frame.
+    Low-visibility landmarks are held at their last estimate instead of following
+    the detector's guess, for up to MAX_HOLD_FRAMES frames so a joint that stays
+    hidden still follows the body; after MAX_GAP_S without a pose the filter starts over.
+    With enabled=False landmarks pass through unchanged.
+    """
+
+    def __init__(self, fps=30, enabled=True):
+        fps = fps or 30
+        self.enabled = enabled
+        self.filter = OneEuroFilter(fps)
+        self.max_gap = int(MAX_GAP_S * fps)
+        self.gap = 0
+        self.held = None  # consecutive low-visibility frames per landmark
+
+    def update(self, lm):
+        """Takes one frame's landmark list (None if no pose) and returns Points, or None."""
+        if lm is None:
+            self.gap += 1
+            if self.gap > self.max_gap:
+                self.filter.reset()
+                self.held = None
+            return None
+        self.gap = 0
+
+        vis = np.array([p.visibility for p in lm])
+        if not self.enabled:
+            return [Point(p.x, p.y, v) for p, v in zip(lm, vis)]
+
+        xy = np.array([(p.x, p.y) for p in lm])
+        weight = np.clip((vis - VIS_LOW) / (VIS_HIGH - VIS_LOW), 0.0, 1.0)
+        low = vis <= VIS_LOW
+        self.held = np.where(low, (self.held if self.held is not None else 0) + 1, 0)
+        weight[self.held > MAX_HOLD_FRAMES] = 1.0
+        xy = self.filter(xy, weight[:, None])
+        return [Point(x, y, v) for (x, y), v in zip(xy, vis)]
@@ -0,0 +1,82 @@
+"""
+Local load test: measures requests/sec and latency at several concurrency levels.
+
+Start the server first (e.g. `gunicorn wsgi:app`), then:
+    python load_test.py                                   # GET /healthz
+    python load_test.py --video static/uploads/conv_3bc9f73a.mp4 --test-type pushups
+    python load_test.py --url http://localhost:8000 --concurrency 1 2 4 8 --requests 40
+"""
+import argparse
+import os
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def build_analyze_request(url, video_path, test_type):
+    """Builds a multipart /analyze request like the one the frontend sends."""
+    boundary = uuid.uuid4().hex
+    fields = {"test_type": test_type, "age": "18", "gender": "male"}
+    body = b""
+    for name, value in fields.items():
+        body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                 f"{value}\r\n").encode()
+    with open(video_path, "rb") as f:
+        body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"video\"; "
+                 f"filename=\"{os.path.basename(video_path)}\"\r\n"
+                 f"Content-Type: application/octet-stream\r\n\r\n").encode() + f.read() + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    return lambda: urllib.request.Request(
+        f"{url}/analyze", data=body, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+
+def timed_request(make_request, timeout):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(make_request(), timeout=timeout) as resp:
+            resp.read()
+            ok = resp.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_level(make_request, concurrency, total, timeout):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: timed_request(make_request, timeout), range(total)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array([lat for lat, ok in results if ok])
+    errors = sum(1 for _, ok in results if not ok)
+    return len(latencies) / elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--video", help="upload this clip to /analyze instead of hitting /healthz")
+    parser.add_argument("--test-type", default="pushups")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=None, help="requests per level (default 4x concurrency)")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    if args.video:
+        make_request = build_analyze_request(args.url, args.video, args.test_type)
+    else:
+        make_request = lambda: urllib.request.Request(f"{args.url}/healthz")
+
+    print(f"{'concurrency':>11} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'errors':>6}")
+    for concurrency in args.concurrency:
+        total = args.requests or concurrency * 4
+        rps, latencies, errors = run_level(make_request, concurrency, total, args.timeout)
+        p50, p95 = (np.percentile(latencies, [50, 95]) if len(latencies) else (float("nan"),) * 2)
+        print(f"{concurrency:>11} {rps:>8.2f} {p50:>8.3f} {p95:>8.3f} {errors:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+import abc
+import contextlib
+import os
+import sys
+import threading
+import urllib.request
+import warnings
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from landmark_filter import OneEuroFilter
+
+mp_pose = mp.solutions.pose
+
+# ------------------ Settings ------------------
+# Per-test model settings. model_complexity: 0 = lite, 1 = full, 2 = heavy.
+# Every test uses the full model until the lite one's score agreement has been
+# measured (backend_benchmark.py); sit-and-reach needs more confident detections.
+POSE_SETTINGS = {
+    "pushups":       dict(model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5),
+    "situps":        dict(model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5),
+    "sit_and_reach": dict(model_complexity=1, min_detection_confidence=0.7, min_tracking_confidence=0.7),
+    "vertical_jump": dict(model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5),
+}
+POSE_BACKEND = os.getenv("POSE_BACKEND", "mediapipe")              # "mediapipe" or "onnx"
+POSE_THREADS = int(os.getenv("POSE_THREADS", 0)) or None           # ONNX Runtime intra-op threads
+POSE_ONNX_MODEL = os.getenv("POSE_ONNX_MODEL", "pose_landmark_full.onnx")
+POSE_ONNX_DETECTOR = os.getenv("POSE_ONNX_DETECTOR", "pose_detection.onnx")
+# Idle backends kept per settings in each worker; one per request thread avoids rebuilding any
+POSE_POOL_SIZE = int(os.getenv("POSE_POOL_SIZE", os.getenv("WEB_THREADS", 2)))
+
+NUM_LANDMARKS = 33
+
+# Only the full landmark model ships with the mediapipe package; the others are fetched
+# once at build/deploy time with `python pose_backend.py` (or by the gunicorn master)
+MODEL_FILES = {0: "pose_landmark_lite.tflite", 1: "pose_landmark_full.tflite", 2: "pose_landmark_heavy.tflite"}
+MODEL_DIR = os.path.join(os.path.dirname(mp.__file__), "modules", "pose_landmark")
+MODEL_URL = "https://storage.googleapis.com/mediapipe-assets/"
+
+# Group mode's multi-person PoseLandmarker needs a .task bundle; it is assembled from the person
+# detector and full landmark model that ship with the package (see build_pose_landmarker_task)
+DETECTOR_MODEL = os.path.join(os.path.dirname(mp.__file__), "modules", "pose_detection", "pose_detection.tflite")
+LANDMARKER_TASK = os.path.join(MODEL_DIR, "pose_landmarker_full.task")
+
+
+def _replace_atomically(path, write):
+    """Calls write(tmp_path), then renames the result to path so no reader sees a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def build_pose_landmarker_task(path=LANDMARKER_TASK):
+    """
+    Builds the PoseLandmarker task bundle from the bundled models if it is missing, and returns its path.
+    The tasks API reads each model's input normalisation from metadata the plain models lack:
+    the detector takes pixels scaled to [-1, 1], the landmark model pixels scaled to [0, 1].
+    """
+    if os.path.exists(path):
+        return path
+    from mediapipe.tasks.python.metadata.metadata_writers import (metadata_writer, model_asset_bundle_utils,
+                                                                  writer_utils)
+
+    def with_metadata(model_path, mean, std):
+        with open(model_path, "rb") as f:
+            model = f.read()
+        writer = metadata_writer.MetadataWriter.create(model).add_image_input([mean], [std])
+        for _ in writer_utils.get_output_tensor_types(model):
+            writer.add_feature_output()
+        return writer.populate()[0]
+
+    models = {
+        "pose_detector.tflite": with_metadata(DETECTOR_MODEL, 127.5, 127.5),
+        "pose_landmarks_detector.tflite": with_metadata(os.path.join(MODEL_DIR, MODEL_FILES[1]), 0.0, 255.0),
+    }
+    _replace_atomically(path, lambda tmp: model_asset_bundle_utils.create_model_asset_bundle(models, tmp))
+    return path
+
+
+def fetch_pose_models(complexities=None):
+    """
+    Downloads the landmark models POSE_SETTINGS uses (or the given complexities) that are missing,
+    and builds group mode's landmarker bundle. Each file is written under a temporary name and
+    renamed into place, so a reader never sees a partial model.
+    """
+    build_pose_landmarker_task()
+    if complexities is None:
+        complexities = {s["model_complexity"] for s in POSE_SETTINGS.values()}
+    for complexity in sorted(complexities):
+        path = os.path.join(MODEL_DIR, MODEL_FILES[complexity])
+        if os.path.exists(path):
+            continue
+        print(f"Downloading {MODEL_FILES[complexity]} to {path}")
+        _replace_atomically(path, lambda tmp: urllib.request.urlretrieve(MODEL_URL + MODEL_FILES[complexity], tmp))
+
+
+class PoseBackend(abc.ABC):
+    """
+    Runs pose estimation on RGB frames.
+    process() returns the frame's landmarks as a NormalizedLandmarkList (what
+    results.pose_landmarks used to be, so mp_drawing still works), or None.
+    reset() forgets the tracked body so the backend can start on a new video.
+    """
+
+    @abc.abstractmethod
+    def process(self, rgb):
+        """Returns the pose landmarks in an RGB frame, or None if there is no pose."""
+
+    @abc.abstractmethod
+    def reset(self):
+        """Drops tracking state from the previous video."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ------------------ MediaPipe ------------------
+class MediaPipeBackend(PoseBackend):
+    """
+    mp_pose.Pose with a chosen model complexity. MediaPipe's Python API has no thread setting,
+    so num_threads (POSE_THREADS) is ignored with a warning.
+    Models are never downloaded here (see fetch_pose_models): if the lite or heavy model is
+    missing or can't be loaded, the backend falls back to the full model.
+    """
+
+    def __init__(self, model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 num_threads=None):
+        if num_threads:
+            warnings.warn(f"The mediapipe pose backend ignores num_threads={num_threads}", stacklevel=2)
+        try:
+            if not os.path.exists(os.path.join(MODEL_DIR, MODEL_FILES[model_complexity])):
+                raise FileNotFoundError(f"{MODEL_FILES[model_complexity]} not fetched")
+            self.pose = mp_pose.Pose(model_complexity=model_complexity,
+                                     min_detection_confidence=min_detection_confidence,
+                                     min_tracking_confidence=min_tracking_confidence)
+            # MediaPipe loads the model on the first frame; do it now so a bad file fails here
+            self.pose.process(np.zeros((64, 64, 3), np.uint8))
+        except (OSError, RuntimeError) as e:
+            if model_complexity == 1:
+                raise
+            print(f"Warning: could not load pose model_complexity={model_complexity} ({e}); using the full model.")
+            model_complexity = 1
+            self.pose = mp_pose.Pose(min_detection_confidence=min_detection_confidence,
+                                     min_tracking_confidence=min_tracking_confidence)
+        self.model_complexity = model_complexity
+
+    def process(self, rgb):
+        return self.pose.process(rgb).pose_landmarks
+
+    def reset(self):
+        # A frame with nobody in it makes the graph drop its tracked region and landmark
+        # smoothing, which gives the same results as a new graph; Pose.reset() would also
+        # restart the graph and reload the models
+        self.pose.process(np.zeros((64, 64, 3), np.uint8))
+
+    def close(self):
+        self.pose.close()
+
+
+# ------------------ ONNX Runtime ------------------
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _detector_anchors(size=224, strides=(8, 16, 32, 32, 32)):
+    """Anchor centres of BlazePose's person detector: two per cell, layers of equal stride share cells."""
+    centres = []
+    for stride in sorted(set(strides)):
+        cells = int(np.ceil(size / stride))
+        per_cell = 2 * strides.count(stride)
+        ys, xs = np.mgrid[:cells, :cells]
+        grid = np.stack([(xs + 0.5) / cells, (ys + 0.5) / cells], axis=-1).reshape(-1, 1, 2)
+        centres.append(np.repeat(grid, per_cell, axis=1).reshape(-1, 2))
+    return np.concatenate(centres)
+
+
+def _aligned_roi(centre, scale_point, roi_scale):
+    """
+    BlazePose's region of interest: a square centred on centre, twice its distance to
+    scale_point across (times roi_scale), rotated so centre -> scale_point points up.
+    Returns (cx, cy, side, rotation) in frame pixels and radians.
+    """
+    dx, dy = scale_point[0] - centre[0], scale_point[1] - centre[1]
+    rotation = np.pi / 2 - np.arctan2(-dy, dx)
+    rotation = (rotation + np.pi) % (2 * np.pi) - np.pi
+    return centre[0], centre[1], 2 * np.hypot(dx, dy) * roi_scale, rotation
+
+
+class OnnxPoseBackend(PoseBackend):
+    """
+    BlazePose's person detector and landmark model exported to ONNX (MediaPipe's
+    pose_detection.tflite and pose_landmark_full.tflite, converted with tf2onnx; the detector's
+    weights are stored sparse and have to be densified first), run on CPU with ONNX Runtime.
+    Like MediaPipe's own graph, the detector finds the body and its alignment; after that the
+    rotated region of interest follows the landmarks from frame to frame, until the pose flag
+    drops below min_tracking_confidence.
+    There is one landmark model, so model_complexity is accepted (POSE_SETTINGS sets it)
+    but ignored with a warning.
+    """
+
+    ROI_SCALE = 1.25  # Margin around the body, as in MediaPipe's own tracking
+    ROI_FILTER = dict(freq=30, min_cutoff=0.01, d_cutoff=1.0)  # MediaPipe's smoothing of the ROI landmarks...
+    ROI_BETA = 10.0                                              # ...with speed measured in body sizes
+    HEATMAP_KERNEL = 7  # Heatmap cells around a landmark used to refine it
+    HEATMAP_MIN_CONFIDENCE = 0.5
+
+    def __init__(self, model_path=POSE_ONNX_MODEL, num_threads=None, min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, model_complexity=None, detector_path=POSE_ONNX_DETECTOR):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The onnx pose backend needs onnxruntime: pip install onnxruntime")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX pose model not found: {model_path} (set POSE_ONNX_MODEL)")
+        if not os.path.exists(detector_path):
+            raise FileNotFoundError(f"ONNX pose detector not found: {detector_path} (set POSE_ONNX_DETECTOR)")
+        if model_complexity is not None:
+            warnings.warn(f"The onnx pose backend ignores model_complexity={model_complexity}", stacklevel=2)
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.detector = ort.InferenceSession(detector_path, options, providers=["CPUExecutionProvider"])
+
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.input_size = inp.shape[1]
+        # Outputs are told apart by shape: landmarks are [1, 195] (39 x 5), the pose flag is [1, 1],
+        # the landmark heatmaps [1, 64, 64, 39]
+        shapes = {o.name: o.shape for o in self.session.get_outputs()}
+        self.landmarks_name = next(n for n, s in shapes.items() if s[-1] == 195)
+        self.flag_name = next(n for n, s in shapes.items() if s[-1] == 1 and len(s) == 2)
+        self.heatmap_name = next(n for n, s in shapes.items() if s[-1] == 39 and len(s) == 4)
+
+        inp = self.detector.get_inputs()[0]
+        self.detector_input_name = inp.name
+        self.detector_size = inp.shape[1]
+        # Boxes are [1, 2254, 12] (box, then 4 keypoints), scores [1, 2254, 1]
+        shapes = {o.name: o.shape for o in self.detector.get_outputs()}
+        self.boxes_name = next(n for n, s in shapes.items() if s[-1] == 12)
+        self.scores_name = next(n for n, s in shapes.items() if s[-1] == 1)
+        self.anchors = _detector_anchors(self.detector_size)
+
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.roi = None  # (cx, cy, side, rotation) in frame pixels and radians
+        self.roi_filter = OneEuroFilter(**self.ROI_FILTER)
+
+    def reset(self):
+        self.roi = None
+        self.roi_filter.reset()
+
+    def detect(self, rgb):
+        """Runs the person detector on the whole frame; returns the most confident body's region, or None."""
+        h, w = rgb.shape[:2]
+        # Letterbox the frame into the detector's square input, scaled to [-1, 1]
+        side = max(w, h)
+        square = np.zeros((side, side, 3), np.uint8)
+        x0, y0 = (side - w) // 2, (side - h) // 2
+        square[y0:y0 + h, x0:x0 + w] = rgb
+        tensor = cv2.resize(square, (self.detector_size, self.detector_size)).astype(np.float32)[None]
+        boxes, scores = self.detector.run([self.boxes_name, self.scores_name],
+                                          {self.detector_input_name: tensor / 127.5 - 1.0})
+        scores = _sigmoid(np.clip(scores.reshape(-1), -100, 100))
+        if scores.max() < self.min_detection_confidence:
+            return None
+
+        # Decode against the anchors, in letterboxed square pixels
+        raw = boxes.reshape(-1, 12) / self.detector_size
+        centres = raw[:, [0, 1]] + self.anchors
+        half = raw[:, [2, 3]] / 2
+        corners = np.concatenate([centres - half, centres + half], axis=1) * side
+        keypoints = (raw[:, 4:].reshape(-1, 4, 2) + self.anchors[:, None]) * side
+
+        # Weighted non-max suppression around the best box, as MediaPipe does
+        best = scores.argmax()
+        lo = np.maximum(corners[best, :2], corners[:, :2])
+        hi = np.minimum(corners[best, 2:], corners[:, 2:])
+        inter = np.prod(np.clip(hi - lo, 0, None), axis=1)
+        areas = np.prod(corners[:, 2:] - corners[:, :2], axis=1)
+        iou = inter / (areas[best] + areas - inter + 1e-9)
+        near = (iou > 0.3) & (scores >= self.min_detection_confidence)
+        kp = np.average(keypoints[near], axis=0, weights=scores[near]) - (x0, y0)
+
+        # Keypoint 0 is the hip centre, keypoint 1 sets the body's size and direction
+        return _aligned_roi(kp[0], kp[1], self.ROI_SCALE)
+
+    def refine(self, xy, heatmap):
+        """
+        Moves each landmark to the confidence-weighted centre of its heatmap around it, as
+        MediaPipe's graph does, where that heatmap is confident (xy in input pixels).
+        """
+        hm_h, hm_w, channels = heatmap.shape
+        confidence = _sigmoid(heatmap)
+        cells = (xy * (hm_w / self.input_size, hm_h / self.input_size)).astype(int)
+        reach = self.HEATMAP_KERNEL // 2
+        for i, (col, row) in enumerate(cells[:channels]):
+            if not (0 <= col < hm_w and 0 <= row < hm_h):
+                continue
+            patch = confidence[max(0, row - reach):row + reach + 1, max(0, col - reach):col + reach + 1, i]
+            if patch.max() < self.HEATMAP_MIN_CONFIDENCE:
+                continue
+            rows, cols = np.mgrid[max(0, row - reach):row + reach + 1, max(0, col - reach):col + reach + 1]
+            rows, cols = rows[:patch.shape[0], :patch.shape[1]], cols[:patch.shape[0], :patch.shape[1]]
+            xy[i] = ((cols * patch).sum() / patch.sum() * self.input_size / hm_w,
+                     (rows * patch).sum() / patch.sum() * self.input_size / hm_h)
+        return xy
+
+    def process(self, rgb):
+        h, w = rgb.shape[:2]
+        roi = self.roi or self.detect(rgb)
+        if roi is None:
+            return None
+        cx, cy, side, rotation = roi
+
+        # Affine map from the model's input pixels to the rotated square in the frame; like
+        # MediaPipe, the parts of the square outside the frame repeat its edge pixels
+        n = self.input_size
+        cos, sin = np.cos(rotation) * side / n, np.sin(rotation) * side / n
+        to_frame = np.array([[cos, -sin, cx - (cos - sin) * n / 2],
+                             [sin, cos, cy - (sin + cos) * n / 2]])
+        crop = cv2.warpAffine(rgb, to_frame, (n, n), flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                              borderMode=cv2.BORDER_REPLICATE)
+        tensor = crop.astype(np.float32)[None] / 255.0
+
+        landmarks, flag, heatmap = self.session.run([self.landmarks_name, self.flag_name, self.heatmap_name],
+                                                    {self.input_name: tensor})
+        if float(flag.ravel()[0]) < self.min_tracking_confidence:
+            self.reset()
+            return None
+
+        # x, y are in input pixels; visibility and presence are logits
+        raw = landmarks.reshape(-1, 5)
+        raw[:, :2] = self.refine(raw[:, :2], heatmap[0])
+        px, py = (to_frame @ np.c_[raw[:, :2], np.ones(len(raw))].T)
+        xs, ys = px[:NUM_LANDMARKS] / w, py[:NUM_LANDMARKS] / h
+        zs = raw[:NUM_LANDMARKS, 2] * side / n / w
+        vis = _sigmoid(raw[:NUM_LANDMARKS, 3])
+
+        # Next region, as BlazePose tracks it: from the body-centre and scale auxiliary landmarks,
+        # smoothed heavily (relative to their spread) so the crop holds still while the body does
+        aux = np.stack([px[NUM_LANDMARKS:NUM_LANDMARKS + 2], py[NUM_LANDMARKS:NUM_LANDMARKS + 2]], axis=1)
+        self.roi_filter.beta = self.ROI_BETA / max(np.ptp(aux, axis=0).mean(), 1.0)
+        aux = self.roi_filter(aux)
+        self.roi = _aligned_roi(aux[0], aux[1], self.ROI_SCALE)
+        if self.roi[2] <= 16:
+            self.reset()
+
+        result = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, v in zip(xs, ys, zs, vis):
+            result.landmark.add(x=float(x), y=float(y), z=float(z), visibility=float(v))
+        return result
+
+
+BACKENDS = {
+    "mediapipe": MediaPipeBackend,
+    "onnx": OnnxPoseBackend,
+}
+
+
+def _backend_settings(test_type, backend, overrides):
+    name = backend or POSE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown pose backend: {name}")
+    settings = dict(POSE_SETTINGS.get(test_type, {}), num_threads=POSE_THREADS)
+    settings.update(overrides)
+    return name, settings
+
+
+def create_pose_backend(test_type=None, backend=None, **overrides):
+    """
+    Builds the pose backend for a test from POSE_SETTINGS, POSE_BACKEND and POSE_THREADS;
+    keyword arguments override any of them for this one backend.
+    """
+    name, settings = _backend_settings(test_type, backend, overrides)
+    return BACKENDS[name](**settings)
+
+
+# ------------------ Per-worker pool ------------------
+# Building a backend loads its models, so each worker process keeps the ones it has built and
+# hands an idle one to each job. A job has its backend to itself until it releases it, so
+# concurrent request threads never share one.
+_pool_lock = threading.Lock()
+_idle = {}   # (backend name, settings) -> idle backends
+_built = {}  # (backend name, settings) -> backends built and not closed
+
+
+def acquire_pose_backend(test_type=None, backend=None, **overrides):
+    """
+    Like create_pose_backend, but reuses an idle backend with the same settings from this
+    worker's pool (with its tracking reset) when there is one. Hand it back with release_pose_backend.
+    """
+    name, settings = _backend_settings(test_type, backend, overrides)
+    key = (name, tuple(sorted(settings.items())))
+    with _pool_lock:
+        pose = _idle[key].pop() if _idle.get(key) else None
+    if pose is not None:
+        pose.reset()
+        return pose
+
+    pose = BACKENDS[name](**settings)
+    pose.pool_key = key
+    with _pool_lock:
+        _built[key] = _built.get(key, 0) + 1
+    return pose
+
+
+def release_pose_backend(pose):
+    """Returns a backend to the pool, or closes it if POSE_POOL_SIZE are already idle."""
+    with _pool_lock:
+        idle = _idle.setdefault(pose.pool_key, [])
+        if len(idle) < POSE_POOL_SIZE:
+            idle.append(pose)
+            return
+        _built[pose.pool_key] -= 1
+    pose.close()
+
+
+@contextlib.contextmanager
+def pooled_pose_backend(test_type=None, backend=None, **overrides):
+    """acquire_pose_backend for a with block; the backend goes back to the pool at the end."""
+    pose = acquire_pose_backend(test_type, backend, **overrides)
+    try:
+        yield pose
+    finally:
+        release_pose_backend(pose)
+
+
+def pool_status():
+    """This worker's pooled backends: settings, how many are built, and how many are idle."""
+    with _pool_lock:
+        return [dict(backend=key[0], **dict(key[1]), built=_built[key], idle=len(_idle.get(key, [])))
+                for key in _built]
+
+
+if __name__ == "__main__":
+    # Build/deploy step: fetch the landmark models POSE_SETTINGS needs (or those named as 0/1/2)
+    fetch_pose_models({int(c) for c in sys.argv[1:]} or None)
@@ -2,6 +2,9 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+from landmark_filter import LandmarkFilter
+from pose_backend    import pooled_pose_backend
+
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
@@ -21,7 +24,34 @@ def calculate_angle(a, b, c):
     return angle
 
 
-def pushup_counter(video_path, output_path="pushup_output.mp4"):
+class PushupCounter:
+    """Counts push-ups from the left elbow angle, one frame at a time."""
+
+    def __init__(self):
+        self.count = 0
+        self.direction = None  # "down" or "up"
+
+    def update(self, angle):
+        # Push-up logic
+        if angle < 90:   # Going down
+            self.direction = "down"
+        elif angle > 160 and self.direction == "down":  # Coming up
+            self.count += 1
+            self.direction = "up"
+
+    def process(self, lm, w, h):
+        """Feed one frame of pose landmarks to the counter."""
+        # Get landmarks for LEFT arm
+        shoulder = lm[mp_pose.PoseLandmark.LEFT_SHOULDER]
+        elbow = lm[mp_pose.PoseLandmark.LEFT_ELBOW]
+        wrist = lm[mp_pose.PoseLandmark.LEFT_WRIST]
+
+        # Calculate elbow angle
+        self.update(calculate_angle(shoulder, elbow, wrist))
+
+
+def pushup_counter(video_path, output_path="pushup_output.mp4", smooth=True, budget=None,
+                   backend_options=None):
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise FileNotFoundError(f"❌ Cannot open {video_path}")
@@ -32,51 +62,38 @@ def pushup_counter(video_path, output_path="pushup_output.mp4"):
     width, height = int(cap.get(3)), int(cap.get(4))
     out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
 
-    pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-
-    pushup_count = 0
-    direction = None  # "down" or "up"
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb)
+    counter = PushupCounter()
+    smoother = LandmarkFilter(fps, enabled=smooth)
 
-        if results.pose_landmarks:
-            lm = results.pose_landmarks.landmark
+    with pooled_pose_backend("pushups", **(backend_options or {})) as pose:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
 
-            # Get landmarks for LEFT arm
-            shoulder = lm[mp_pose.PoseLandmark.LEFT_SHOULDER]
-            elbow = lm[mp_pose.PoseLandmark.LEFT_ELBOW]
-            wrist = lm[mp_pose.PoseLandmark.LEFT_WRIST]
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            pose_landmarks = pose.process(rgb)
+            lm = smoother.update(pose_landmarks.landmark if pose_landmarks else None)
 
-            # Calculate elbow angle
-            angle = calculate_angle(shoulder, elbow, wrist)
+            if lm:
+                counter.process(lm, width, height)
 
-            # Push-up logic
-            if angle < 90:   # Going down
-                direction = "down"
-            elif angle > 160 and direction == "down":  # Coming up
-                pushup_count += 1
-                direction = "up"
+                # Draw pose
+                mp_drawing.draw_landmarks(frame, pose_landmarks, mp_pose.POSE_CONNECTIONS)
 
-            # Draw pose
-            mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+                # Show counter
+                cv2.putText(frame, f"Push-ups: {counter.count}", (30, 50),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
-            # Show counter
-            cv2.putText(frame, f"Push-ups: {pushup_count}", (30, 50),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            out.write(frame)
 
-        out.write(frame)
+            if budget and budget.exhausted(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000, lm is not None):
+                break
 
     cap.release()
     out.release()
-    pose.close()
 
     print("✅ Push-up Detection Done!")
-    print("Total Push-ups:", pushup_count)
+    print("Total Push-ups:", counter.count)
     # Return count and the actual output path so app can serve it
-    return pushup_count, output_path
+    return counter.count, output_path
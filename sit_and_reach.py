@@ -2,10 +2,67 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+from landmark_filter import LandmarkFilter
+from pose_backend    import pooled_pose_backend
+
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
-def sit_and_reach_tracker(input_path, output_path="sit_and_reach_output.mp4"):
+SCALE_FRAMES = 15  # Average the hip-to-ankle length over this many frames before locking the scale
+
+
+class ReachTracker:
+    """Tracks the maximum forward reach past the starting hip position, one frame at a time."""
+
+    def __init__(self):
+        self.max_reach_px = 0
+        self.reach_origin_px = None
+        self.scale_cm_per_px = None
+        self.scale_samples = []
+
+    @property
+    def max_reach_cm(self):
+        return self.max_reach_px * self.scale_cm_per_px if self.scale_cm_per_px else 0
+
+    def process(self, lm, w, h):
+        """Feed one frame of pose landmarks to the tracker."""
+        # Get landmark positions
+        left_hip = lm[mp_pose.PoseLandmark.LEFT_HIP.value]
+        right_hip = lm[mp_pose.PoseLandmark.RIGHT_HIP.value]
+        left_ankle = lm[mp_pose.PoseLandmark.LEFT_ANKLE.value]
+        right_ankle = lm[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
+        left_wrist = lm[mp_pose.PoseLandmark.LEFT_WRIST.value]
+        right_wrist = lm[mp_pose.PoseLandmark.RIGHT_WRIST.value]
+
+        # Convert to pixel coordinates
+        hand_x = int(((left_wrist.x + right_wrist.x) / 2) * w)
+        hip_x = int(((left_hip.x + right_hip.x) / 2) * w)
+
+        # Use a reference point on the hip to mark the start of the reach
+        if self.reach_origin_px is None:
+            self.reach_origin_px = hip_x
+
+        # Distance: how far hands reached compared to the hip's starting point
+        # This assumes the hip remains relatively stationary.
+        current_reach_px = hand_x - self.reach_origin_px
+
+        # Use a reference length to establish a cm/pixel ratio
+        # The length from hip to ankle is a good proxy for body scale.
+        if len(self.scale_samples) < SCALE_FRAMES:
+            hip_y = ((left_hip.y + right_hip.y) / 2) * h
+            ankle_y = ((left_ankle.y + right_ankle.y) / 2) * h
+            hip_to_ankle_px = abs(hip_y - ankle_y)
+            # Assume an average hip-to-ankle length of ~60cm for a general scale
+            if hip_to_ankle_px > 0:
+                self.scale_samples.append(hip_to_ankle_px)
+                self.scale_cm_per_px = 60 / np.mean(self.scale_samples)
+
+        if current_reach_px > self.max_reach_px:
+            self.max_reach_px = current_reach_px
+
+
+def sit_and_reach_tracker(input_path, output_path="sit_and_reach_output.mp4", smooth=True, budget=None,
+                          backend_options=None):
     """
     Processes a video file to calculate the maximum sit-and-reach distance.
     Returns the max reach in cm and the path to the output video.
@@ -18,11 +75,10 @@ def sit_and_reach_tracker(input_path, output_path="sit_and_reach_output.mp4"):
     out = cv2.VideoWriter(output_path, fourcc, cap.get(cv2.CAP_PROP_FPS),
                           (int(cap.get(3)), int(cap.get(4))))
 
-    max_reach_px = 0
-    reach_origin_px = None
-    scale_cm_per_px = None
+    tracker = ReachTracker()
+    smoother = LandmarkFilter(cap.get(cv2.CAP_PROP_FPS), enabled=smooth)
 
-    with mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7) as pose:
+    with pooled_pose_backend("sit_and_reach", **(backend_options or {})) as pose:
         while cap.isOpened():
             ret, frame = cap.read()
             if not ret:
@@ -31,59 +87,27 @@ def sit_and_reach_tracker(input_path, output_path="sit_and_reach_output.mp4"):
             h, w, _ = frame.shape
             image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             image.flags.writeable = False
-            results = pose.process(image)
+            pose_landmarks = pose.process(image)
             image.flags.writeable = True
             image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+            lm = smoother.update(pose_landmarks.landmark if pose_landmarks else None)
+
+            if lm:
+                tracker.process(lm, w, h)
 
-            if results.pose_landmarks:
-                landmarks = results.pose_landmarks.landmark
-
-                # Get landmark positions
-                left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-                right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-                left_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-                right_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-                left_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-                right_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value]
-
-                # Convert to pixel coordinates
-                foot_x = int(((left_ankle.x + right_ankle.x) / 2) * w)
-                hand_x = int(((left_wrist.x + right_wrist.x) / 2) * w)
-                hip_x = int(((left_hip.x + right_hip.x) / 2) * w)
-                
-                # Use a reference point on the hip to mark the start of the reach
-                if reach_origin_px is None:
-                    reach_origin_px = hip_x
-
-                # Distance: how far hands reached compared to the hip's starting point
-                # This assumes the hip remains relatively stationary.
-                current_reach_px = hand_x - reach_origin_px
-
-                # Use a reference length to establish a cm/pixel ratio
-                # The length from hip to ankle is a good proxy for body scale.
-                if scale_cm_per_px is None:
-                    hip_y = int(((left_hip.y + right_hip.y) / 2) * h)
-                    ankle_y = int(((left_ankle.y + right_ankle.y) / 2) * h)
-                    hip_to_ankle_px = abs(hip_y - ankle_y)
-                    # Assume an average hip-to-ankle length of ~60cm for a general scale
-                    if hip_to_ankle_px > 0:
-                        scale_cm_per_px = 60 / hip_to_ankle_px
-
-                if current_reach_px > max_reach_px:
-                    max_reach_px = current_reach_px
-                
                 # Draw landmarks and connections
-                mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+                mp_drawing.draw_landmarks(image, pose_landmarks, mp_pose.POSE_CONNECTIONS)
 
                 # Display stats on the video
-                max_reach_cm = max_reach_px * scale_cm_per_px if scale_cm_per_px else 0
-                cv2.putText(image, f"Max Reach: {max_reach_cm:.1f} cm", (30, 80),
+                cv2.putText(image, f"Max Reach: {tracker.max_reach_cm:.1f} cm", (30, 80),
                             cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
             
             out.write(image)
 
+            if budget and budget.exhausted(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000, lm is not None):
+                break
+
     cap.release()
     out.release()
 
-    max_reach_cm = max_reach_px * scale_cm_per_px if scale_cm_per_px else 0
-    return max_reach_cm, output_path
+    return tracker.max_reach_cm, output_path
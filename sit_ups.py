@@ -1,7 +1,8 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-from collections import deque
+from landmark_filter import LandmarkFilter
+from pose_backend    import pooled_pose_backend
 
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
@@ -20,7 +21,6 @@ def angle_between(a, b, c):
 # ------------------ Thresholds and Constants ------------------
 HIP_DOWN_ANGLE_TH = 160     # Angle when lying down
 HIP_UP_ANGLE_TH = 80        # Angle at the top of the sit-up
-SMOOTHING_WINDOW = 5
 
 # ------------------ Situp Counter Class ------------------
 class SitupCounter:
@@ -28,12 +28,10 @@ class SitupCounter:
         self.state = "down"
         self.reps = 0
         self.valid_reps = 0
-        self.hip_angles = deque(maxlen=SMOOTHING_WINDOW)
         self.min_hip_in_rep = 180
 
-    def update(self, hip_angle):
-        self.hip_angles.append(hip_angle)
-        h_ang = np.mean(self.hip_angles)
+    def update(self, h_ang):
+        # Landmarks arrive already smoothed by LandmarkFilter
         self.min_hip_in_rep = min(self.min_hip_in_rep, h_ang)
 
         if self.state == "down":
@@ -49,8 +47,24 @@ class SitupCounter:
                 self.state = "down"
                 self.min_hip_in_rep = 180
 
+    def process(self, lm, w, h):
+        """Feed one frame of pose landmarks to the counter."""
+        def xy(i): return np.array([lm[i].x * w, lm[i].y * h])
+
+        # hip angle = shoulder-hip-knee
+        left_hip_ang = angle_between(xy(mp_pose.PoseLandmark.LEFT_SHOULDER),
+                                      xy(mp_pose.PoseLandmark.LEFT_HIP),
+                                      xy(mp_pose.PoseLandmark.LEFT_KNEE))
+        right_hip_ang = angle_between(xy(mp_pose.PoseLandmark.RIGHT_SHOULDER),
+                                       xy(mp_pose.PoseLandmark.RIGHT_HIP),
+                                       xy(mp_pose.PoseLandmark.RIGHT_KNEE))
+        hip_angle = (left_hip_ang + right_hip_ang) / 2.0
+
+        self.update(hip_angle)
+
 # ------------------ Main Processing Function ------------------
-def situp_counter(input_path, output_path="output_situps.mp4"):
+def situp_counter(input_path, output_path="output_situps.mp4", smooth=True, budget=None,
+                  backend_options=None):
     cap = cv2.VideoCapture(input_path)
     if not cap.isOpened():
         raise IOError("Cannot open video file.")
@@ -59,46 +73,39 @@ def situp_counter(input_path, output_path="output_situps.mp4"):
     out = cv2.VideoWriter(output_path, fourcc, cap.get(cv2.CAP_PROP_FPS),
                           (int(cap.get(3)), int(cap.get(4))))
     
-    pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
     counter = SitupCounter()
+    smoother = LandmarkFilter(cap.get(cv2.CAP_PROP_FPS), enabled=smooth)
     font = cv2.FONT_HERSHEY_SIMPLEX
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    with pooled_pose_backend("situps", **(backend_options or {})) as pose:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
         
-        frame = cv2.resize(frame, (640, 480))
-        h, w = frame.shape[:2]
-
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image_rgb)
-
-        if results.pose_landmarks:
-            lm = results.pose_landmarks.landmark
-            def xy(i): return np.array([lm[i].x * w, lm[i].y * h])
-
-            # hip angle = shoulder-hip-knee
-            left_hip_ang = angle_between(xy(mp_pose.PoseLandmark.LEFT_SHOULDER),
-                                          xy(mp_pose.PoseLandmark.LEFT_HIP),
-                                          xy(mp_pose.PoseLandmark.LEFT_KNEE))
-            right_hip_ang = angle_between(xy(mp_pose.PoseLandmark.RIGHT_SHOULDER),
-                                           xy(mp_pose.PoseLandmark.RIGHT_HIP),
-                                           xy(mp_pose.PoseLandmark.RIGHT_KNEE))
-            hip_angle = (left_hip_ang + right_hip_ang) / 2.0
-            
-            counter.update(hip_angle)
+            frame = cv2.resize(frame, (640, 480))
+            h, w = frame.shape[:2]
 
-            # Draw landmarks and info
-            mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            pose_landmarks = pose.process(image_rgb)
+            lm = smoother.update(pose_landmarks.landmark if pose_landmarks else None)
+
+            if lm:
+                counter.process(lm, w, h)
+
+                # Draw landmarks and info
+                mp_drawing.draw_landmarks(frame, pose_landmarks, mp_pose.POSE_CONNECTIONS)
             
-            # Reps and status overlay
-            cv2.rectangle(frame, (0, 0), (320, 120), (0, 0, 0), -1)
-            cv2.putText(frame, "TOTAL REPS: {}".format(counter.reps), (10, 40), font, 1, (255, 255, 255), 2)
-            cv2.putText(frame, "GOOD REPS: {}".format(counter.valid_reps), (10, 80), font, 1, (0, 255, 0), 2)
-            cv2.putText(frame, "BAD REPS: {}".format(counter.reps - counter.valid_reps), (10, 120), font, 1, (0, 0, 255), 2)
+                # Reps and status overlay
+                cv2.rectangle(frame, (0, 0), (320, 120), (0, 0, 0), -1)
+                cv2.putText(frame, "TOTAL REPS: {}".format(counter.reps), (10, 40), font, 1, (255, 255, 255), 2)
+                cv2.putText(frame, "GOOD REPS: {}".format(counter.valid_reps), (10, 80), font, 1, (0, 255, 0), 2)
+                cv2.putText(frame, "BAD REPS: {}".format(counter.reps - counter.valid_reps), (10, 120), font, 1, (0, 0, 255), 2)
+
+            out.write(frame)
 
-        out.write(frame)
+            if budget and budget.exhausted(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000, lm is not None):
+                break
 
     cap.release()
     out.release()
@@ -0,0 +1,67 @@
+"""
+Production entry point: serves the analyzer app and the chat API from one application.
+
+Run with gunicorn (settings come from gunicorn.conf.py and the environment):
+    gunicorn wsgi:app
+
+The gunicorn master fetches any pose models POSE_SETTINGS needs before forking workers;
+for images without network access at runtime, run `python pose_backend.py` at build time.
+Each worker then builds POSE_POOL_SIZE pose backends per test (default WEB_THREADS) and
+/analyze jobs reuse them; /readyz reports them.
+
+The development servers in fitness_test_app.py and main.py still work on their own.
+"""
+import threading
+
+import numpy as np
+from flask import jsonify
+from flask_cors import CORS
+
+from fitness_test_app import app
+from main import handle_chat
+from pose_backend import POSE_POOL_SIZE, POSE_SETTINGS, acquire_pose_backend, pool_status, release_pose_backend
+
+# The chat API lives on the analyzer app; keep it callable from other origins as before
+app.add_url_rule("/chat", view_func=handle_chat, methods=["POST"])
+CORS(app, resources={r"/chat": {"origins": "*"}})
+
+pose_ready = threading.Event()
+warm_up_error = None
+
+
+def warm_up_pose():
+    """
+    Fills this worker's pose backend pool: POSE_POOL_SIZE backends per test's settings, each
+    run on one frame, which the analyzers then reuse instead of building their own per job.
+    """
+    global warm_up_error
+    try:
+        for test_type in POSE_SETTINGS:
+            backends = [acquire_pose_backend(test_type) for _ in range(POSE_POOL_SIZE)]
+            for pose in backends:
+                pose.process(np.zeros((256, 256, 3), np.uint8))
+                release_pose_backend(pose)
+        pose_ready.set()
+    except Exception as e:
+        warm_up_error = str(e)
+        print(f"Pose warm-up failed: {e}")
+
+
+@app.route("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return jsonify(status="ok")
+
+
+@app.route("/readyz")
+def readyz():
+    """Readiness: this worker's pooled pose backends are built and loaded."""
+    if warm_up_error:
+        return jsonify(status="failed", error=warm_up_error, pose_backends=pool_status()), 503
+    if not pose_ready.is_set():
+        return jsonify(status="warming_up", pose_backends=pool_status()), 503
+    return jsonify(status="ready", pose_backends=pool_status())
+
+
+# Each gunicorn worker imports this module after forking, so every worker fills its own pool
+threading.Thread(target=warm_up_pose, daemon=True).start()